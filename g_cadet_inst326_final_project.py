@@ -1,7 +1,15 @@
-from bs4 import BeautifulSoup
+from io import BytesIO
+from lxml import etree
 import requests
-import csv
+from requests.adapters import HTTPAdapter
+import os
+import pickle
+import sys
+import threading
+import time
 from enum import Enum
+from functools import lru_cache
+from operator import attrgetter
 
 class Choice(Enum):
     """
@@ -16,6 +24,7 @@ class Choice(Enum):
     LOOKUP_CONSTRUCTORS = 7
     SCRAPE_F1_CRASH_DATA = 8
     EXIT = 9
+    FINISH_RACE = 10
 
 class Driver:
     """
@@ -32,14 +41,41 @@ class Driver:
         """
         self.name = name
         self.team = team
-        self.points = 0
-        self.position = None
+        self._points = 0
+        self._position = None
+        self._str_cache = None
+
+    @property
+    def points(self):
+        """
+        the driver's points, clearing the cached string when changed
+        """
+        return self._points
+
+    @points.setter
+    def points(self, value):
+        self._points = value
+        self._str_cache = None
+
+    @property
+    def position(self):
+        """
+        the driver's position, clearing the cached string when changed
+        """
+        return self._position
+
+    @position.setter
+    def position(self, value):
+        self._position = value
+        self._str_cache = None
 
     def __str__(self):
         """
         returns string that represents the driver
         """
-        return f"Driver: {self.name}, Team: {self.team.name}, Points: {self.points}, Position: {self.position}"
+        if self._str_cache is None:
+            self._str_cache = f"Driver: {self.name}, Team: {self.team.name}, Points: {self._points}, Position: {self._position}"
+        return self._str_cache
 
 class Team:
     """
@@ -53,14 +89,41 @@ class Team:
             name is a string that has the name of the team
         """
         self.name = name
-        self.points = 0
+        self._points = 0
         self.drivers = []
+        self._driver_names = []
+        self._str_cache = None
+
+    @property
+    def points(self):
+        """
+        the team's points, clearing the cached string when changed
+        """
+        return self._points
+
+    @points.setter
+    def points(self, value):
+        self._points = value
+        self._str_cache = None
+
+    def add_driver(self, driver):
+        """
+        adds a driver to the team and clears the cached string
+
+        arguments:
+            driver is the Driver that is joining the team
+        """
+        self.drivers.append(driver)
+        self._driver_names.append(driver.name)
+        self._str_cache = None
 
     def __str__(self):
         """
         Return a string representation of the team.
         """
-        return f"Team: {self.name}, Points: {self.points}, Drivers: {[driver.name for driver in self.drivers]}"
+        if self._str_cache is None:
+            self._str_cache = f"Team: {self.name}, Points: {self._points}, Drivers: {self._driver_names}"
+        return self._str_cache
 
 class RaceResult:
     """
@@ -90,6 +153,7 @@ class Race:
         """
         self.name = name
         self.results = []
+        self.finished = False
 
     def __str__(self):
         """
@@ -97,7 +161,69 @@ class Race:
         """
         return f"Race: {self.name}"
 
+CRASH_DATA_URL = "https://f1-dnf-stats.fly.dev/"
+CRASH_DATA_MAX_AGE = 3600
+
+def _make_session():
+    """
+    returns an http session with pooled connections, cached on disk if requests_cache is installed
+    """
+    try:
+        import requests_cache
+        session = requests_cache.CachedSession('f1_dnf_cache', expire_after=CRASH_DATA_MAX_AGE)
+    except ImportError:
+        session = requests.Session()
+    session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=4))
+    return session
+
+_session = None
+_crash_prefetch = None
+
+def _get_session():
+    """
+    returns the shared http session, creating it on first use
+    """
+    global _session
+    if _session is None:
+        _session = _make_session()
+    return _session
+
+def prefetch_crash_data():
+    """
+    start downloading the crash data page on a daemon thread so exiting never waits on it
+    """
+    global _crash_prefetch
+    session = _get_session()
+    outcome = {}
+
+    def fetch():
+        try:
+            outcome['response'] = session.get(CRASH_DATA_URL, timeout=10)
+        except Exception as e:
+            outcome['error'] = e
+        outcome['fetched_at'] = time.monotonic()
+
+    thread = threading.Thread(target=fetch, daemon=True)
+    thread.start()
+    _crash_prefetch = (thread, outcome)
+
+def _get_crash_page():
+    """
+    returns the crash data response, using the prefetched one if there is one and it is not too old
+    """
+    global _crash_prefetch
+    prefetch, _crash_prefetch = _crash_prefetch, None
+    if prefetch is not None:
+        thread, outcome = prefetch
+        thread.join()
+        if time.monotonic() - outcome['fetched_at'] <= CRASH_DATA_MAX_AGE:
+            if 'error' in outcome:
+                raise outcome['error']
+            return outcome['response']
+    return _get_session().get(CRASH_DATA_URL, timeout=10)
+
 POINT_SCALE = {1: 25, 2: 18, 3: 15, 4: 12, 5: 10, 6: 8, 7: 6, 8: 4, 9: 2, 10: 1}
+POINTS_BY_POS = tuple(POINT_SCALE.get(position, 0) for position in range(max(POINT_SCALE) + 1))
 
 drivers_dict = {}
 teams_dict = {}
@@ -105,47 +231,131 @@ race_dict = {}
 champions_dict = {}
 constructors_dict = {}
 
+_read_line = input
+
+_drivers_sorted_dirty = True
+_drivers_sorted_cache = []
+_teams_sorted_dirty = True
+_teams_sorted_cache = []
+
+def _invalidate_standings():
+    """
+    mark the cached driver and team standings as out of date
+    """
+    global _drivers_sorted_dirty, _teams_sorted_dirty
+    _drivers_sorted_dirty = True
+    _teams_sorted_dirty = True
+
+def _parse_year_csv(csv_path):
+    """
+    parse a year,name csv file into a dict keyed by year
+
+    arguments:
+        csv_path is a string that has the path of the csv file
+    """
+    data = {}
+    with open(csv_path, 'r', encoding='utf-8-sig') as file:
+        for line in file:
+            year, name = line.rstrip('\n').split(',', 1)
+            data[int(year)] = name.strip()
+    return data
+
+def _cached_load(csv_path, pkl_path):
+    """
+    load a year,name csv file, reusing a pickled copy if it is newer than the csv
+
+    the pickle files are trusted local caches written by this program,
+    pickle.load runs whatever a pickle file contains so never point this at
+    a file from somewhere else
+
+    arguments:
+        csv_path is a string that has the path of the csv file
+        pkl_path is a string that has the path of the pickle cache
+    """
+    try:
+        if os.path.getmtime(pkl_path) >= os.path.getmtime(csv_path):
+            with open(pkl_path, 'rb') as file:
+                data = pickle.load(file)
+            if isinstance(data, dict):
+                return data
+    except (OSError, pickle.PickleError, EOFError, ValueError, AttributeError, ImportError):
+        pass
+    data = _parse_year_csv(csv_path)
+    try:
+        with open(pkl_path, 'wb') as file:
+            pickle.dump(data, file, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass
+    return data
+
 def load_champions():
     """
     load the champions info from the file
     """
-    with open('f1info.csv', 'r', encoding='utf-8-sig') as file:
-        reader = csv.reader(file)
-        for row in reader:
-            year, champion = row
-            champions_dict[int(year)] = champion.strip()
+    champions_dict.update(_cached_load('f1info.csv', 'f1info.pkl'))
+    _format_champion.cache_clear()
 
 def load_constructors():
     """
     load the constructors information from the file
     """
-    with open('f1info2.csv', 'r', encoding='utf-8-sig') as file:
-        reader = csv.reader(file)
-        for row in reader:
-            year, constructor = row
-            constructors_dict[int(year)] = constructor.strip()
+    constructors_dict.update(_cached_load('f1info2.csv', 'f1info2.pkl'))
+    _format_constructor.cache_clear()
 
-def lookup_champion():
+@lru_cache(maxsize=256)
+def _format_champion(year):
     """
-    look up the drivers info from a year
+    returns the message for the drivers champion of a year
     """
-    year = int(input("Enter year: "))
     champion = champions_dict.get(year)
     if champion:
-        print(f"The drivers champion of {year} was {champion}.")
-    else:
-        print(f"No information available for the year {year}.")
+        return f"The drivers champion of {year} was {champion}."
+    return f"No information available for the year {year}."
 
-def lookup_constructors():
+@lru_cache(maxsize=256)
+def _format_constructor(year):
     """
-    look up the constructors champion from a year
+    returns the message for the constructors champion of a year
     """
-    year = int(input("Enter year: "))
     constructor = constructors_dict.get(year)
     if constructor:
-        print(f"The constructors champion of {year} was {constructor}.")
-    else:
-        print(f"No information available for the year {year}.")
+        return f"The constructors champion of {year} was {constructor}."
+    return f"No information available for the year {year}."
+
+def lookup_champion():
+    """
+    look up the drivers info from a year
+    """
+    print(_format_champion(int(_read_line("Enter year: "))))
+
+def lookup_constructors():
+    """
+    look up the constructors champion from a year
+    """
+    print(_format_constructor(int(_read_line("Enter year: "))))
+
+def _add_driver_line(data):
+    """
+    add a driver from a 'driver_name, team_name' line
+
+    arguments:
+        data is a string that has the driver's name and team separated by a comma
+    """
+    try:
+        name, team_name = [d.strip() for d in data.split(',')]
+        if not name or not team_name:
+            print("Invalid input, please try again.")
+            return
+        team = teams_dict.get(team_name)
+        if not team:
+            team = Team(team_name)
+            teams_dict[team_name] = team
+        driver = Driver(name, team)
+        drivers_dict[name] = driver
+        team.add_driver(driver)
+        _invalidate_standings()
+    except ValueError:
+        print("Invalid input, please provide data in format 'driver_name, team_name'.")
 
 def add_driver():
     """
@@ -153,23 +363,20 @@ def add_driver():
     """
     print("Enter driver's name and their team, separated by a comma. When finished, type 'DONE':")
     while True:
-        data = input("> ")
-        if data.lower() == 'done':
+        data = _read_line("> ")
+        if data.strip().lower() == 'done':
             break
-        try:
-            name, team_name = [d.strip() for d in data.split(',')]
-            if not name or not team_name:
-                print("Invalid input, please try again.")
-                continue
-            team = teams_dict.get(team_name)
-            if not team:
-                team = Team(team_name)
-                teams_dict[team_name] = team
-            driver = Driver(name, team)
-            drivers_dict[name] = driver
-            team.drivers.append(driver)
-        except ValueError:
-            print("Invalid input, please provide data in format 'driver_name, team_name'.")
+        _add_driver_line(data)
+
+def add_drivers_bulk(lines):
+    """
+    add drivers without prompting
+
+    arguments:
+        lines is a list of strings in the format 'driver_name, team_name'
+    """
+    for data in lines:
+        _add_driver_line(data)
 
 def add_race():
     """
@@ -177,42 +384,76 @@ def add_race():
     """
     print("Enter race names, one per line. When finished, type 'DONE':")
     while True:
-        name = input("> ")
-        if name.lower() == 'done':
+        name = _read_line("> ")
+        if name.strip().lower() == 'done':
             break
+        add_races_bulk([name])
+
+def add_races_bulk(lines):
+    """
+    add races without prompting
+
+    arguments:
+        lines is a list of strings that have the race names
+    """
+    for name in lines:
         name = name.strip()
         if name:
             race = Race(name)
             race_dict[name] = race
 
+RESULT_PROMPT = "Enter driver's name and position, separated by a comma. When finished, type 'DONE'"
+
+def _discard_until_done(prompt):
+    """
+    read and throw away input lines up to and including the next 'DONE' line
+
+    arguments:
+        prompt is a string that is shown when reading each line
+    """
+    while _read_line(prompt).strip().lower() != 'done':
+        pass
+
 def record_race_result():
     """
     record race result
     """
-    race_name = input("Enter race name: ").strip()
+    race_name = _read_line("Enter race name: ").strip()
+    race = race_dict.get(race_name)
+    if not race:
+        print("Invalid race name.")
+        _discard_until_done(RESULT_PROMPT)
+        return
+    if race.finished:
+        print("That race has already been finished.")
+        _discard_until_done(RESULT_PROMPT)
+        return
 
     while True:
-        data = input("Enter driver's name and position, separated by a comma. When finished, type 'DONE'").split(',')
-        if len(data) < 2 or data[0].lower() == 'done':
+        raw = _read_line(RESULT_PROMPT)
+        if raw.strip().lower() == 'done':
             break
+        data = raw.split(',')
+        if len(data) != 2:
+            print("Invalid input, please provide data in format 'driver_name, position'.")
+            continue
 
         driver_name, position = [d.strip() for d in data]
 
-        if int(position) < 1:
+        try:
+            position = int(position)
+        except ValueError:
+            position = 0
+        if position < 1:
             print("Invalid position.")
             continue
 
-        race = race_dict.get(race_name)
         driver = drivers_dict.get(driver_name)
 
-        if race and driver:
-            result = RaceResult(driver, int(position))
-            race.results.append(result)
-            points = POINT_SCALE.get(result.position, 0)
-            result.driver.points += points
-            result.driver.team.points += points
+        if driver:
+            race.results.append(RaceResult(driver, position))
         else:
-            print("Invalid driver name or race name.")
+            print("Invalid driver name.")
 
 
 
@@ -220,93 +461,192 @@ def finish_race():
     """
     finish a race and calculate the driver and teams points
     """
-    race_names = input("Enter race name (or multiple names separated by commas): ").split(',')
+    race_names = _read_line("Enter race name (or multiple names separated by commas): ").split(',')
+    points_by_pos = POINTS_BY_POS
+    scored_positions = len(points_by_pos)
     for race_name in race_names:
         race_name = race_name.strip()
+        if not race_name:
+            continue
         race = race_dict.get(race_name)
 
-        if race:
-            for result in race.results:
-                points = POINT_SCALE.get(result.position, 0)
-                result.driver.points += points
-                result.driver.team.points += points
+        if not race:
+            print("Invalid race name.")
+            continue
+        if race.finished:
+            print("That race has already been finished.")
+            continue
+        race.finished = True
+        for result in race.results:
+            position = result.position
+            points = points_by_pos[position] if position < scored_positions else 0
+            driver = result.driver
+            driver.points += points
+            driver.team.points += points
+        _invalidate_standings()
 
 def display_driver_position():
     """
     display positions of all drivers
     """
-    sorted_drivers = sorted(drivers_dict.values(), key=lambda driver: driver.points, reverse=True)
+    global _drivers_sorted_dirty, _drivers_sorted_cache
+    if _drivers_sorted_dirty:
+        _drivers_sorted_cache = sorted(drivers_dict.values(), key=attrgetter('points'), reverse=True)
+        for i, driver in enumerate(_drivers_sorted_cache, 1):
+            driver.position = i
+        _drivers_sorted_dirty = False
 
-    for i, driver in enumerate(sorted_drivers, 1):
-        driver.position = i
-
-    for driver in sorted_drivers:
-        print(driver)
+    if _drivers_sorted_cache:
+        sys.stdout.write('\n'.join(str(driver) for driver in _drivers_sorted_cache) + '\n')
 
 
 def display_team_standings():
     """
     display team standings with positions
     """
-    sorted_teams = sorted(teams_dict.values(), key=lambda team: team.points, reverse=True)
+    global _teams_sorted_dirty, _teams_sorted_cache
+    if _teams_sorted_dirty:
+        _teams_sorted_cache = sorted(teams_dict.values(), key=attrgetter('points'), reverse=True)
+        _teams_sorted_dirty = False
 
-    for i, team in enumerate(sorted_teams, 1):
-        print(f"Position: {i}, {team}")
+    if _teams_sorted_cache:
+        lines = [f"Position: {i}, {team}" for i, team in enumerate(_teams_sorted_cache, 1)]
+        sys.stdout.write('\n'.join(lines) + '\n')
 
 
 def scrape_f1_crash_data():
     """
     scrape crash info from website
     """
-    url = "https://f1-dnf-stats.fly.dev/"
-    response = requests.get(url)
+    response = _get_crash_page()
     if response.status_code == 200:
-        soup = BeautifulSoup(response.content, 'html.parser')
-        table = soup.find('table')
-        if table:
-            rows = table.find_all('tr')
-            for row in rows[1:]:
-                columns = row.find_all('td')
+        found_table = False
+        header_skipped = False
+        encoding = response.encoding or 'utf-8'
+        for _, elem in etree.iterparse(BytesIO(response.content), events=('end',), tag=('tr', 'table'), html=True, encoding=encoding):
+            if elem.tag == 'table':
+                found_table = True
+                break
+            if not header_skipped:
+                header_skipped = True
+            else:
+                columns = elem.findall('td')
                 if columns:
-                    driver = columns[0].text.strip()
-                    dnf_count = columns[1].text.strip()
-                    percent = columns[2].text.strip()
-                    print(f"Season: {driver}, DNF Count: {dnf_count}, DNF Percentage: {percent}")
-        else:
+                    season = ''.join(columns[0].itertext()).strip()
+                    dnf_count = ''.join(columns[1].itertext()).strip()
+                    percent = ''.join(columns[2].itertext()).strip()
+                    print(f"Season: {season}, DNF Count: {dnf_count}, DNF Percentage: {percent}")
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+        if not found_table:
             print("No crash data table found on the page.")
     else:
         print("Failed to scrape the F1 crash data website.")
 
+def _take_until_done(lines):
+    """
+    returns the lines up to, but not including, the next 'DONE' line
+
+    arguments:
+        lines is an iterator of strings
+    """
+    taken = []
+    for line in lines:
+        if line.strip().lower() == 'done':
+            break
+        taken.append(line)
+    return taken
+
+def run_choice(choice):
+    """
+    run the action for a menu choice, returns False when the program should exit
+
+    arguments:
+        choice is the Choice that was selected
+    """
+    if choice == Choice.ADD_RACE:
+        add_race()
+    elif choice == Choice.ADD_DRIVER:
+        add_driver()
+    elif choice == Choice.RECORD_RESULT:
+        record_race_result()
+    elif choice == Choice.FINISH_RACE:
+        finish_race()
+    elif choice == Choice.DISPLAY_POSITION:
+        display_driver_position()
+    elif choice == Choice.DISPLAY_STANDINGS:
+        display_team_standings()
+    elif choice == Choice.LOOKUP_CHAMPION:
+        lookup_champion()
+    elif choice == Choice.LOOKUP_CONSTRUCTORS:
+        lookup_constructors()
+    elif choice == Choice.SCRAPE_F1_CRASH_DATA:
+        scrape_f1_crash_data()
+    elif choice == Choice.EXIT:
+        return False
+    else:
+        print("Invalid choice, please try again.")
+    return True
+
+def run_batch(lines):
+    """
+    run menu choices from a list of lines without printing prompts
+
+    the lines are the same answers that would be typed at the interactive
+    prompts, so adding drivers or races takes every line up to 'DONE'
+
+    arguments:
+        lines is a list of strings read from stdin
+    """
+    global _read_line
+    lines = iter(lines)
+
+    def read_line(prompt=''):
+        try:
+            return next(lines)
+        except StopIteration:
+            raise EOFError from None
+
+    previous_read_line = _read_line
+    _read_line = read_line
+    try:
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                choice = Choice(int(line))
+                if choice == Choice.ADD_RACE:
+                    add_races_bulk(_take_until_done(lines))
+                elif choice == Choice.ADD_DRIVER:
+                    add_drivers_bulk(_take_until_done(lines))
+                elif not run_choice(choice):
+                    break
+            except EOFError:
+                break
+            except ValueError:
+                print("Invalid input, please try again.")
+            except Exception as e:
+                print(f"An error occurred: {e}")
+    finally:
+        _read_line = previous_read_line
+
 def main():
     """
     main function to run program
     """
     load_champions()
     load_constructors()
+    if len(sys.argv) > 1 and sys.argv[1] == '--batch':
+        run_batch(sys.stdin.read().splitlines())
+        return
+    prefetch_crash_data()
     while True:
-        print("1. Add Current Season Race\n2. Add Current Season Driver\n3. Record Current Season Race Result\n4. Display Current Driver Position\n5. Display Current Team Standings\n6. Lookup Drivers Previous Champion\n7. Lookup Previous Constructors Champion\n8. Display F1 Crash Statistics\n9. Exit")
+        print("1. Add Current Season Race\n2. Add Current Season Driver\n3. Record Current Season Race Result\n4. Display Current Driver Position\n5. Display Current Team Standings\n6. Lookup Drivers Previous Champion\n7. Lookup Previous Constructors Champion\n8. Display F1 Crash Statistics\n9. Exit\n10. Finish Current Season Race")
         try:
-            choice = Choice(int(input("Enter your choice: ")))
-            if choice == Choice.ADD_RACE:
-                add_race()
-            elif choice == Choice.ADD_DRIVER:
-                add_driver()
-            elif choice == Choice.RECORD_RESULT:
-                record_race_result()
-            elif choice == Choice.DISPLAY_POSITION:
-                display_driver_position()
-            elif choice == Choice.DISPLAY_STANDINGS:
-                display_team_standings()
-            elif choice == Choice.LOOKUP_CHAMPION:
-                lookup_champion()
-            elif choice == Choice.LOOKUP_CONSTRUCTORS:
-                lookup_constructors()
-            elif choice == Choice.SCRAPE_F1_CRASH_DATA:
-                scrape_f1_crash_data()
-            elif choice == Choice.EXIT:
+            choice = Choice(int(_read_line("Enter your choice: ")))
+            if not run_choice(choice):
                 break
-            else:
-                print("Invalid choice, please try again.")
         except ValueError:
             print("Invalid input, please try again.")
         except Exception as e:
@@ -314,5 +654,3 @@ def main():
 
 if __name__ == '__main__':
     main()
-
-